@@ -1,20 +1,38 @@
+import atexit
+import functools
+import itertools
+import json
 import logging
 import os
+import queue
+import signal
 import sys
+import threading
+import time
+from array import array
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 import telebot
 from telebot import types
 from telebot.apihelper import ApiTelegramException
 
+_log_queue = queue.SimpleQueue()
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler('bot.log', encoding='utf-8')
+_file_handler.setFormatter(_log_formatter)
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(_log_formatter)
+_log_listener = QueueListener(_log_queue, _file_handler, _stream_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    format='%(message)s',
+    handlers=[QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
@@ -44,14 +62,19 @@ def load_token() -> str:
     print("\n" + "="*60)
     sys.exit(1)
 
+_dotenv_done = False
+
+# Единственное место, где читается .env — не вызывайте load_dotenv() в других местах
 def load_token_from_env() -> Optional[str]:
-    try:
-        from dotenv import load_dotenv
-        load_dotenv()
-        return os.environ.get("BOT_TOKEN")
-    except ImportError:
-        logger.warning("python-dotenv не установлен, пропускаем .env")
-        return None
+    global _dotenv_done
+    if not _dotenv_done:
+        _dotenv_done = True
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            logger.warning("python-dotenv не установлен, пропускаем .env")
+    return os.environ.get("BOT_TOKEN")
 
 def load_token_from_config() -> Optional[str]:
     try:
@@ -78,17 +101,27 @@ def input_token_interactive() -> Optional[str]:
 def validate_token(token: str) -> bool:
     if not token:
         return False
-    parts = token.split(':')
-    if len(parts) != 2:
-        return False
-    if not parts[0].isdigit():
-        return False
-    if len(parts[1]) < 10:
-        return False
-    return True
+    seen_colon = False
+    digits = 0
+    tail = 0
+    for c in token:
+        b = ord(c)
+        if b == 58:
+            if seen_colon or digits == 0:
+                return False
+            seen_colon = True
+            continue
+        if not seen_colon:
+            if 48 <= b <= 57:
+                digits += 1
+            else:
+                return False
+        else:
+            tail += 1
+    return seen_colon and tail >= 10
 
 TOKEN = load_token()
-bot = telebot.TeleBot(TOKEN, parse_mode='HTML')
+bot = telebot.TeleBot(TOKEN, parse_mode='HTML', threaded=True, num_threads=8)
 
 class Config:
     AUTHOR = "Конфидент"
@@ -162,51 +195,157 @@ class Config:
         0: {"name": "☢️ ЯДЕРНЫЙ УРОВЕНЬ", "color": "☢️", "desc": "Вы вообще не скрываетесь?!"}
     }
 
+_ANSWERS = tuple(sys.intern(s) for s in ("Все", "Мои контакты", "Никто", "❌ Отмена"))
+_ANSWER_SET = frozenset(_ANSWERS)
+_CANCEL = _ANSWERS[3]
+
+_QUESTIONS = Config.QUESTIONS
+_N = len(_QUESTIONS)
+_POINTS = {sys.intern(k): v for k, v in Config.POINTS.items()}
+
+_LEVELS = tuple(Config.LEVELS[i] for i in range(11))
+
+def _prerender_questions():
+    for i, q in enumerate(_QUESTIONS):
+        q["_prompt"] = f"""
+<b>Вопрос {i + 1} из {_N}</b>
+
+{q['text']}
+
+Выберите вариант ответа:
+    """
+        q["_explanations"] = {
+            sys.intern(ans): f"""
+<b>Ваш ответ:</b> <code>{ans}</code>
+
+{risk_text}
+
+<b>🔧 Как исправить:</b>
+{q["fix"]}
+
+<i>Нажмите на кнопку в Telegram чтобы перейти прямо в настройки</i>
+    """
+            for ans, risk_text in q["risks"].items()
+        }
+
+_prerender_questions()
+
+_BARS = ["".join("🟩" if i < s else "⬜" for i in range(10)) for s in range(11)]
+
 class UserSession:
     def __init__(self, user_id: int):
         self.user_id = user_id
-        self.answers: List[Dict] = []
+        self.answer_ids: List[str] = []
+        self.answer_texts: List[str] = []
+        self.answer_points = array('b')
         self.current_question = 0
         self.score = 0
-        self.start_time = datetime.now()
+        self.start_monotonic = time.monotonic()
+        self.last_seen = self.start_monotonic
         self.username = ""
         self.first_name = ""
+        self.lock = threading.Lock()
         
     def add_answer(self, question_id: str, answer: str, points: int):
-        self.answers.append({
-            "question_id": question_id,
-            "answer": answer,
-            "points": points,
-            "timestamp": datetime.now()
-        })
+        self.answer_ids.append(question_id)
+        self.answer_texts.append(answer)
+        self.answer_points.append(points)
         self.score += points
         
     def get_progress(self) -> str:
-        total = len(Config.QUESTIONS)
-        return f"{self.current_question}/{total} ({(self.current_question/total*100):.0f}%)"
+        return f"{self.current_question}/{_N} ({(self.current_question/_N*100):.0f}%)"
     
     def is_completed(self) -> bool:
-        return self.current_question >= len(Config.QUESTIONS)
+        return self.current_question >= _N
 
 sessions: Dict[int, UserSession] = {}
-
-def create_keyboard() -> types.ReplyKeyboardMarkup:
-    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=3)
-    keyboard.add("Все", "Мои контакты", "Никто")
-    keyboard.add("❌ Отмена")
-    return keyboard
-
-def remove_keyboard() -> types.ReplyKeyboardRemove:
-    return types.ReplyKeyboardRemove()
+_sessions_lock = threading.RLock()
+
+def drop_session(chat_id: int, session: UserSession) -> bool:
+    with _sessions_lock:
+        if sessions.get(chat_id) is not session:
+            return False
+        del sessions[chat_id]
+        return True
+
+SESSION_TTL = 3600
+SESSION_SWEEP_INTERVAL = 300
+MAX_SESSIONS = 10000
+_sweeper_stop = threading.Event()
+
+def _try_drop_idle(chat_id: int, session: UserSession, cutoff: Optional[float] = None) -> bool:
+    if not session.lock.acquire(blocking=False):
+        return False
+    try:
+        if cutoff is not None and session.last_seen >= cutoff:
+            return False
+        return drop_session(chat_id, session)
+    finally:
+        session.lock.release()
+
+def sweep_sessions():
+    cutoff = time.monotonic() - SESSION_TTL
+    expired = 0
+    with _sessions_lock:
+        snapshot = list(sessions.items())
+    for chat_id, s in snapshot:
+        if s.last_seen < cutoff and _try_drop_idle(chat_id, s, cutoff):
+            expired += 1
+    if expired:
+        logger.info("Удалено устаревших сессий: %d", expired)
+
+def ensure_session_capacity():
+    if len(sessions) < MAX_SESSIONS:
+        return
+    sweep_sessions()
+    with _sessions_lock:
+        snapshot = list(sessions.items())
+    for chat_id, s in sorted(snapshot, key=lambda kv: kv[1].last_seen):
+        if len(sessions) < MAX_SESSIONS:
+            break
+        _try_drop_idle(chat_id, s)
+
+def _session_sweeper():
+    while not _sweeper_stop.wait(SESSION_SWEEP_INTERVAL):
+        sweep_sessions()
+        save_stats()
+
+def start_session_sweeper():
+    threading.Thread(target=_session_sweeper, name="session-sweeper", daemon=True).start()
+
+STATS_FILE = 'stats.json'
+_stats_lock = threading.Lock()
+_save_lock = threading.Lock()
+_score_hist = [0] * 11
+_score_sum = 0
+_score_n = 0
+_today = datetime.now().date()
+_sessions_today = 0
+
+_KEYBOARD = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=3)
+_KEYBOARD.add(*_ANSWERS[:3])
+_KEYBOARD.add(_CANCEL)
+
+_REMOVE = types.ReplyKeyboardRemove()
+
+_START_KEYBOARD = types.InlineKeyboardMarkup()
+_START_KEYBOARD.add(types.InlineKeyboardButton("🚀 Начать проверку", callback_data="start_check"))
 
 @bot.message_handler(commands=['start', 'help'])
 def handle_start(message: types.Message):
     user = message.from_user
     chat_id = message.chat.id
     
-    sessions[chat_id] = UserSession(chat_id)
-    sessions[chat_id].username = user.username or ""
-    sessions[chat_id].first_name = user.first_name or "Пользователь"
+    session = UserSession(chat_id)
+    session.username = user.username or ""
+    session.first_name = user.first_name or "Пользователь"
+    with _sessions_lock:
+        is_new = chat_id not in sessions
+        if is_new:
+            ensure_session_capacity()
+        sessions[chat_id] = session
+    if is_new:
+        count_session_today()
     
     welcome_text = f"""
 <b>👋 Привет, {user.first_name}!</b>
@@ -229,41 +368,35 @@ def handle_start(message: types.Message):
 <code>Нажмите кнопку ниже чтобы начать проверку!</code>
     """
     
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton("🚀 Начать проверку", callback_data="start_check"))
-    
-    bot.send_message(chat_id, welcome_text, reply_markup=keyboard)
-    logger.info(f"Пользователь {user.id} начал сессию")
+    bot.send_message(chat_id, welcome_text, reply_markup=_START_KEYBOARD)
+    logger.info("Пользователь %s начал сессию", user.id)
 
 @bot.callback_query_handler(func=lambda call: call.data == "start_check")
 def start_check_callback(call: types.CallbackQuery):
     chat_id = call.message.chat.id
     
-    if chat_id not in sessions:
+    session = sessions.get(chat_id)
+    if not session:
         bot.send_message(chat_id, "Напишите /start чтобы начать заново")
         return
     
     bot.answer_callback_query(call.id)
-    ask_question(chat_id)
-
-def ask_question(chat_id: int):
-    session = sessions.get(chat_id)
+    with session.lock:
+        if sessions.get(chat_id) is not session:
+            bot.send_message(chat_id, "Сессия завершена или истекла. Напишите /start чтобы начать заново")
+            return
+        session.last_seen = time.monotonic()
+        ask_question(chat_id, session)
+
+def ask_question(chat_id: int, session: Optional[UserSession]):
     if not session or session.is_completed():
         return
     
-    question = Config.QUESTIONS[session.current_question]
+    question = _QUESTIONS[session.current_question]
     
-    question_text = f"""
-<b>Вопрос {session.current_question + 1} из {len(Config.QUESTIONS)}</b>
+    bot.send_message(chat_id, question["_prompt"], reply_markup=_KEYBOARD)
 
-{question['text']}
-
-Выберите вариант ответа:
-    """
-    
-    bot.send_message(chat_id, question_text, reply_markup=create_keyboard())
-
-@bot.message_handler(func=lambda m: m.text in ["Все", "Мои контакты", "Никто", "❌ Отмена"])
+@bot.message_handler(func=lambda m: m.text in _ANSWER_SET)
 def handle_answer(message: types.Message):
     chat_id = message.chat.id
     session = sessions.get(chat_id)
@@ -272,65 +405,46 @@ def handle_answer(message: types.Message):
         bot.send_message(chat_id, "Напишите /start чтобы начать")
         return
     
-    if message.text == "❌ Отмена":
-        bot.send_message(chat_id, "❌ Проверка отменена. Для начала новой напишите /start", 
-                        reply_markup=remove_keyboard())
-        sessions.pop(chat_id, None)
-        return
-    
-    question = Config.QUESTIONS[session.current_question]
-    answer = message.text
-    points = Config.POINTS[answer]
-    
-    session.add_answer(question["id"], answer, points)
-    
-    send_risk_explanation(chat_id, question, answer)
-    
-    session.current_question += 1
-    
-    if session.is_completed():
-        send_final_report(chat_id)
-        sessions.pop(chat_id, None)
-    else:
-        ask_question(chat_id)
+    with session.lock:
+        if sessions.get(chat_id) is not session or session.is_completed():
+            bot.send_message(chat_id, "Сессия завершена или истекла. Напишите /start чтобы начать заново")
+            return
+        
+        session.last_seen = time.monotonic()
+        
+        if message.text == _CANCEL:
+            bot.send_message(chat_id, "❌ Проверка отменена. Для начала новой напишите /start",
+                            reply_markup=_REMOVE)
+            drop_session(chat_id, session)
+            return
+        
+        question = _QUESTIONS[session.current_question]
+        answer = message.text
+        points = _POINTS[answer]
+        
+        session.add_answer(question["id"], answer, points)
+        
+        send_risk_explanation(chat_id, question, answer)
+        
+        session.current_question += 1
+        
+        if session.is_completed():
+            send_final_report(chat_id, session)
+            drop_session(chat_id, session)
+        else:
+            ask_question(chat_id, session)
 
 def send_risk_explanation(chat_id: int, question: Dict, answer: str):
-    risk_text = question["risks"][answer]
-    
-    explanation = f"""
-<b>Ваш ответ:</b> <code>{answer}</code>
+    bot.send_message(chat_id, question["_explanations"][answer])
 
-{risk_text}
-
-<b>🔧 Как исправить:</b>
-{question["fix"]}
-
-<i>Нажмите на кнопку в Telegram чтобы перейти прямо в настройки</i>
-    """
-    
-    bot.send_message(chat_id, explanation, reply_markup=remove_keyboard())
-    
-    import time
-    time.sleep(1)
-
-def send_final_report(chat_id: int):
-    session = sessions.get(chat_id)
-    if not session:
-        return
-    
-    score = session.score
-    level = Config.LEVELS.get(score, Config.LEVELS[0])
-    
-    duration = datetime.now() - session.start_time
-    minutes = int(duration.total_seconds() // 60)
-    seconds = int(duration.total_seconds() % 60)
-    
-    report = f"""
+@functools.lru_cache(maxsize=11)
+def _level_blocks(score: int) -> Tuple[str, str, str]:
+    level = _LEVELS[score]
+    header = f"""
 {level['color']} <b>ПЕРСОНАЛИЗИРОВАННЫЙ ОТЧЕТ</b> {level['color']}
 
-<b>👤 Пользователь:</b> {session.first_name}
-<b>📅 Дата проверки:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}
-<b>⏱️ Время прохождения:</b> {minutes} мин {seconds} сек
+"""
+    summary = f"""
 
 <b>🎯 ИТОГОВЫЙ РЕЗУЛЬТАТ:</b>
 <b>Оценка:</b> <code>{score}/10 баллов</code>
@@ -339,58 +453,66 @@ def send_final_report(chat_id: int):
 
 <b>📊 РАСПРЕДЕЛЕНИЕ ОТВЕТОВ:</b>
     """
+    footer = f"""
+    
+<b>📈 ВИЗУАЛЬНАЯ ШКАЛА ЗАЩИТЫ:</b>
+{_BARS[score]} {score}/10
+
+<b>🔄 Для нового теста напишите</b> <code>/start</code>
+
+<b>💡 Совет:</b> Регулярно проверяйте настройки приватности!
+<b>🔐 Берегите свои данные!</b>
+    """
+    return header, summary, footer
+
+def send_final_report(chat_id: int, session: UserSession):
+    score = session.score
+    record_score(score)
+    header, summary, footer = _level_blocks(score)
+    
+    elapsed = time.monotonic() - session.start_monotonic
+    minutes = int(elapsed // 60)
+    seconds = int(elapsed % 60)
+    
+    parts = [
+        header,
+        f"<b>👤 Пользователь:</b> {session.first_name}\n"
+        f"<b>📅 Дата проверки:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
+        f"<b>⏱️ Время прохождения:</b> {minutes} мин {seconds} сек",
+        summary
+    ]
     
-    answers_count = {"Все": 0, "Мои контакты": 0, "Никто": 0}
-    for ans in session.answers:
-        answers_count[ans["answer"]] += 1
+    answers_count = Counter(session.answer_texts)
     
-    report += f"""
+    parts.append(f"""
 • <code>Никто</code> (🟢 безопасно): {answers_count['Никто']}/5
 • <code>Мои контакты</code> (🟡 средний риск): {answers_count['Мои контакты']}/5
 • <code>Все</code> (🔴 высокий риск): {answers_count['Все']}/5
-    """
+    """)
     
-    report += "\n\n<b>🔍 ДЕТАЛЬНЫЙ АНАЛИЗ:</b>\n"
-    
-    weak_points = []
-    for i, ans in enumerate(session.answers):
-        question = Config.QUESTIONS[i]
-        if ans["points"] < 2:
-            weak_points.append((question, ans))
-    
-    if weak_points:
-        report += "\n<b>🚨 СЛАБЫЕ МЕСТА (рекомендуем исправить):</b>\n"
-        for question, ans in weak_points:
-            risk_level = "🔴 ВЫСОКИЙ" if ans["points"] == 0 else "🟡 СРЕДНИЙ"
-            report += f"\n• <b>{question['text']}</b>\n"
-            report += f"  Ваш ответ: <code>{ans['answer']}</code> ({risk_level} риск)\n"
-            report += f"  Исправить: {question['fix']}\n"
-    else:
-        report += "\n<b>✅ Отличная работа! Все настройки оптимальны.</b>\n"
+    parts.append("\n\n<b>🔍 ДЕТАЛЬНЫЙ АНАЛИЗ:</b>\n")
     
-    visual_bar = ""
-    for i in range(10):
-        if i < score:
-            visual_bar += "🟩"
-        else:
-            visual_bar += "⬜"
+    weak_idx = [i for i, p in enumerate(session.answer_points) if p < 2]
     
-    report += f"""
+    if weak_idx:
+        parts.append("\n<b>🚨 СЛАБЫЕ МЕСТА (рекомендуем исправить):</b>\n")
+        parts.extend(
+            f"\n• <b>{_QUESTIONS[i]['text']}</b>\n"
+            f"  Ваш ответ: <code>{session.answer_texts[i]}</code> "
+            f"({'🔴 ВЫСОКИЙ' if session.answer_points[i] == 0 else '🟡 СРЕДНИЙ'} риск)\n"
+            f"  Исправить: {_QUESTIONS[i]['fix']}\n"
+            for i in weak_idx
+        )
+    else:
+        parts.append("\n<b>✅ Отличная работа! Все настройки оптимальны.</b>\n")
     
-<b>📈 ВИЗУАЛЬНАЯ ШКАЛА ЗАЩИТЫ:</b>
-{visual_bar} {score}/10
-
-<b>🔄 Для нового теста напишите</b> <code>/start</code>
-
-<b>💡 Совет:</b> Регулярно проверяйте настройки приватности!
-<b>🔐 Берегите свои данные!</b>
-    """
+    parts.append(footer)
     
-    bot.send_message(chat_id, report, reply_markup=remove_keyboard())
+    bot.send_message(chat_id, "".join(parts), reply_markup=_REMOVE)
     
     stats_text = f"""
 <b>📈 СТАТИСТИКА ПРОВЕРКИ:</b>
-• Всего проверок сегодня: {len([s for s in sessions.values() if s.start_time.date() == datetime.now().date()])}
+• Всего проверок сегодня: {get_sessions_today()}
 • Средний результат: <code>{calculate_average_score():.1f}/10</code>
 • Ваш результат лучше чем у {calculate_percentile(score):.0f}% пользователей
 
@@ -398,22 +520,77 @@ def send_final_report(chat_id: int):
     """
     
     bot.send_message(chat_id, stats_text)
-    logger.info(f"Пользователь {chat_id} завершил проверку с результатом {score}/10")
+    logger.info("Пользователь %s завершил проверку с результатом %d/10", chat_id, score)
+
+def _roll_today():
+    global _today, _sessions_today
+    now_date = datetime.now().date()
+    if now_date != _today:
+        _today = now_date
+        _sessions_today = 0
+
+def count_session_today():
+    global _sessions_today
+    with _stats_lock:
+        _roll_today()
+        _sessions_today += 1
+
+def get_sessions_today() -> int:
+    with _stats_lock:
+        _roll_today()
+        return _sessions_today
+
+def record_score(score: int):
+    global _score_sum, _score_n
+    with _stats_lock:
+        _score_hist[score] += 1
+        _score_sum += score
+        _score_n += 1
 
 def calculate_average_score() -> float:
-    if not sessions:
-        return 0.0
-    total = sum(s.score for s in sessions.values())
-    return total / len(sessions)
+    with _stats_lock:
+        if not _score_n:
+            return 0.0
+        return _score_sum / _score_n
 
 def calculate_percentile(score: int) -> float:
-    if not sessions:
-        return 100.0
-    scores = [s.score for s in sessions.values()]
-    lower_scores = sum(1 for s in scores if s < score)
-    return (lower_scores / len(scores)) * 100
+    with _stats_lock:
+        if not _score_n:
+            return 100.0
+        return sum(_score_hist[:score]) / _score_n * 100
+
+def load_stats():
+    global _score_sum, _score_n
+    try:
+        with open(STATS_FILE, 'r', encoding='utf-8') as f:
+            hist = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.warning("Не удалось загрузить статистику из %s: %s", STATS_FILE, e)
+        return
+    if (not isinstance(hist, list) or len(hist) != len(_score_hist)
+            or not all(type(n) is int and n >= 0 for n in hist)):
+        logger.warning("Некорректный формат %s, статистика сброшена", STATS_FILE)
+        return
+    with _stats_lock:
+        _score_hist[:] = hist
+        _score_sum = sum(s * n for s, n in enumerate(_score_hist))
+        _score_n = sum(_score_hist)
+
+def save_stats():
+    with _stats_lock:
+        hist = list(_score_hist)
+    tmp_path = STATS_FILE + '.tmp'
+    try:
+        with _save_lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(hist, f)
+            os.replace(tmp_path, STATS_FILE)
+    except OSError as e:
+        logger.error("Не удалось сохранить статистику в %s: %s", STATS_FILE, e)
 
-ADMIN_IDS = []
+ADMIN_IDS: FrozenSet[int] = frozenset()
 
 @bot.message_handler(commands=['stats'])
 def handle_stats(message: types.Message):
@@ -424,7 +601,7 @@ def handle_stats(message: types.Message):
     stats_text = f"""
 <b>📊 СТАТИСТИКА БОТА:</b>
 • Активных сессий: {len(sessions)}
-• Всего пользователей сегодня: {len([s for s in sessions.values() if s.start_time.date() == datetime.now().date()])}
+• Всего проверок сегодня: {get_sessions_today()}
 • Средний балл: {calculate_average_score():.1f}/10
 • Время работы: {(datetime.now() - start_time).total_seconds() / 3600:.1f} часов
     """
@@ -445,19 +622,16 @@ def handle_version(message: types.Message):
     
     bot.send_message(message.chat.id, version_text)
 
+_UNK_ITER = itertools.cycle((
+    "Я понимаю только кнопки и команды /start",
+    "Пожалуйста, используйте кнопки для ответов",
+    "Напишите /start чтобы начать проверку",
+    "Выберите вариант ответа из кнопок ниже"
+))
+
 @bot.message_handler(func=lambda m: True)
 def handle_unknown(message: types.Message):
-    responses = [
-        "Я понимаю только кнопки и команды /start",
-        "Пожалуйста, используйте кнопки для ответов",
-        "Напишите /start чтобы начать проверку",
-        "Выберите вариант ответа из кнопок ниже"
-    ]
-    
-    import random
-    response = random.choice(responses)
-    
-    bot.send_message(message.chat.id, response, reply_markup=create_keyboard())
+    bot.send_message(message.chat.id, next(_UNK_ITER), reply_markup=_KEYBOARD)
 
 def check_dependencies():
     try:
@@ -474,11 +648,20 @@ if __name__ == "__main__":
     print("="*60)
     
     check_dependencies()
+    load_stats()
+    start_session_sweeper()
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.stop_polling())
     
     start_time = datetime.now()
     
-    bot_info = bot.get_me()
-    logger.info(f"Бот запущен: @{bot_info.username} ({bot_info.first_name})")
+    try:
+        bot_info = bot.get_me()
+    except Exception as e:
+        logger.error("Критическая ошибка: %s", e)
+        print(f"\n❌ Ошибка: {e}")
+        print("Проверьте токен и интернет соединение")
+        sys.exit(1)
+    logger.info("Бот запущен: @%s (%s)", bot_info.username, bot_info.first_name)
     
     print(f"\n✅ Бот успешно запущен!")
     print(f"👤 Имя бота: {bot_info.first_name}")
@@ -489,14 +672,13 @@ if __name__ == "__main__":
     print("⏹️  Для остановки нажмите Ctrl+C")
     print("="*60 + "\n")
     
+    # infinity_polling сам перехватывает Ctrl+C и ошибки сети, поэтому сюда попадаем только после остановки
     try:
-        bot.polling(none_stop=True, interval=1, timeout=30)
-    except KeyboardInterrupt:
-        logger.info("Бот остановлен пользователем")
-        print("\n\n👋 Бот остановлен. До свидания!")
-    except Exception as e:
-        logger.error(f"Критическая ошибка: {e}")
-        print(f"\n❌ Ошибка: {e}")
-
-        print("Проверьте токен и интернет соединение")
+        bot.infinity_polling(timeout=60, long_polling_timeout=60, skip_pending=True)
+    finally:
+        _sweeper_stop.set()
+        save_stats()
+    
+    logger.info("Бот остановлен пользователем")
+    print("\n\n👋 Бот остановлен. До свидания!")
 